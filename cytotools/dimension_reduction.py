@@ -25,6 +25,7 @@ CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
 TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
+import inspect
 import logging
 from typing import Dict
 from typing import List
@@ -46,9 +47,37 @@ from umap import UMAP
 from .feedback import progress_bar
 from .sampling import sample_dataframe
 
+try:
+    from openTSNE import TSNE as _OpenTSNE
+except ImportError:
+    _OpenTSNE = None
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
 logger = logging.getLogger(__name__)
 
 
+def _try_cuml() -> Optional[Dict[str, type]]:
+    """
+    Import the GPU accelerated implementations of UMAP, t-SNE and PCA from the RAPIDS cuML library.
+
+    Returns
+    -------
+    Dict[str, type] or None
+        Mapping of method name to cuML class, or None if cuML is not installed
+    """
+    try:
+        from cuml.decomposition import PCA as cuPCA
+        from cuml.manifold import TSNE as cuTSNE
+        from cuml.manifold import UMAP as cuUMAP
+    except ImportError:
+        return None
+    return {"UMAP": cuUMAP, "PCA": cuPCA, "TSNE": cuTSNE}
+
+
 class DimensionReductionMethod(ABC):
     @abstractmethod
     def fit(self, X: Union[pd.DataFrame, np.ndarray]) -> Union[pd.DataFrame, np.ndarray]:
@@ -63,6 +92,78 @@ class DimensionReductionMethod(ABC):
         ...
 
 
+class OpenTSNE(DimensionReductionMethod):
+    """
+    Wrapper around the openTSNE implementation of t-SNE, exposing the 'fit', 'fit_transform' and 'transform'
+    methods expected by DimensionReduction. openTSNE uses FFT-accelerated interpolation for the gradient and
+    parallel approximate nearest neighbours, scaling far better than Scikit-Learn's TSNE. Unlike Scikit-Learn,
+    a fitted embedding can also be used to 'transform' new data.
+
+    Parameters
+    ----------
+    kwargs:
+        Keyword arguments passed to openTSNE.TSNE. For convenience the Scikit-Learn arguments 'init' and 'angle'
+        are mapped to their openTSNE equivalents ('initialization' and 'theta'); other Scikit-Learn only
+        arguments raise a TypeError.
+
+    Raises
+    ------
+    ImportError
+        openTSNE is not installed
+    TypeError
+        A Scikit-Learn TSNE argument with no openTSNE equivalent was given
+    """
+
+    _sklearn_aliases = {"init": "initialization", "angle": "theta"}
+    _sklearn_only = ("method", "min_grad_norm", "n_iter_without_progress", "square_distances")
+
+    def __init__(self, **kwargs):
+        if _OpenTSNE is None:
+            raise ImportError("OpenTSNE requires the openTSNE package to be installed")
+        unsupported = [x for x in self._sklearn_only if x in kwargs]
+        if unsupported:
+            raise TypeError(
+                f"Scikit-Learn TSNE arguments {unsupported} are not supported by openTSNE; see the openTSNE "
+                f"documentation for equivalent parameters"
+            )
+        kwargs = {self._sklearn_aliases.get(k, k): v for k, v in kwargs.items()}
+        self._tsne = _OpenTSNE(**kwargs)
+        self.embedding_ = None
+
+    def fit(self, X: Union[pd.DataFrame, np.ndarray]):
+        self.embedding_ = self._tsne.fit(np.asarray(X))
+        return self
+
+    def fit_transform(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        self.fit(X)
+        return np.asarray(self.embedding_)
+
+    def transform(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        if self.embedding_ is None:
+            raise ValueError("OpenTSNE must be fitted prior to calling 'transform'")
+        return np.asarray(self.embedding_.transform(np.asarray(X)))
+
+
+def _accepts_n_jobs(method: type) -> bool:
+    """
+    Check if the given dimension reduction class accepts the argument 'n_jobs'
+
+    Parameters
+    ----------
+    method: type
+
+    Returns
+    -------
+    bool
+    """
+    if method is OpenTSNE:
+        return True
+    try:
+        return "n_jobs" in inspect.signature(method.__init__).parameters
+    except (TypeError, ValueError):
+        return False
+
+
 class DimensionReduction:
     """
     Dimension reduction methods with in-built support for:
@@ -75,11 +176,16 @@ class DimensionReduction:
     * Isomap
     * PHATE
 
+    t-SNE is performed with openTSNE if it is installed, otherwise Scikit-Learn's TSNE is used.
+
     You can provide your own custom method by providing a class to the 'method' parameter, so long as that
     class has a 'fit_transform' function defined, with optionally 'fit' and 'transform' also defined. These methods
     should accept a Pandas DataFrame and a list of columns (features). The 'transform' and 'fit_transform' functions
     must return a Pandas DataFrame with embeddings as new columns.
 
+    Methods chosen by name (see DimensionReduction.base_methods) receive the features as a C-contiguous float32
+    array; custom methods receive the features at the precision of the DataFrame.
+
     Parameters
     -----------
     method: str or custom type
@@ -87,8 +193,23 @@ class DimensionReduction:
     n_components: int (Default=2)
         Number of embeddings to retain
     random_state: int (default=42)
+    backend: str (default="cpu")
+        Either "cpu" or "cuml". If "cuml", UMAP, t-SNE and PCA are performed on the GPU using the
+        RAPIDS cuML library (requires a CUDA GPU and cuML installed). Other methods are unaffected. If cuML
+        cannot be imported, the CPU implementations are used and a warning is logged.
+    faiss_knn: bool (default=False)
+        If True, the k nearest neighbours graph for UMAP is computed with a FAISS HNSW index (see
+        DimensionReduction.precompute_knn) and passed to UMAP as 'precomputed_knn', which is considerably faster
+        than UMAP's own nearest neighbour descent for large datasets. Requires faiss to be installed. Note, UMAP
+        cannot 'transform' new data when fitted with a precomputed nearest neighbours graph, so the graph is only
+        used by 'fit_transform'; 'fit' uses UMAP's own nearest neighbour search. The UMAP metric must be
+        'euclidean'. Ignored for all other methods.
     kwargs:
-        Additional keyword arguments passed to base method
+        Additional keyword arguments passed to base method. Note, when n_components is an integer, PCA defaults
+        to svd_solver="randomized" (with random_state=42), which is much faster than a full SVD when n_components
+        is small relative to the number of features; pass svd_solver to override. Methods that accept 'n_jobs'
+        default to n_jobs=-1 (all available cores). If openTSNE is installed, TSNE keyword arguments are passed to
+        openTSNE's TSNE rather than Scikit-Learn's (see OpenTSNE for how Scikit-Learn arguments are handled).
 
     Attributes
     ----------
@@ -101,19 +222,44 @@ class DimensionReduction:
     base_methods = {
         "UMAP": UMAP,
         "PCA": PCA,
-        "TSNE": TSNE,
+        "TSNE": OpenTSNE if _OpenTSNE is not None else TSNE,
         "PHATE": phate.PHATE,
         "KernelPCA": KernelPCA,
         "MDS": MDS,
         "Isomap": Isomap,
     }
 
-    def __init__(self, method: Union[str, DimensionReductionMethod], n_components: int = 2, **kwargs):
+    def __init__(
+        self,
+        method: Union[str, DimensionReductionMethod],
+        n_components: int = 2,
+        backend: str = "cpu",
+        faiss_knn: bool = False,
+        **kwargs,
+    ):
+        if backend not in ["cpu", "cuml"]:
+            raise ValueError("backend must be one of: 'cpu' or 'cuml'")
+        methods = self.base_methods
+        self._gpu = False
+        if backend == "cuml":
+            cuml_methods = _try_cuml()
+            if cuml_methods is None:
+                logger.warning("Could not import cuML, falling back to CPU implementation")
+            else:
+                methods = {**methods, **cuml_methods}
+                self._gpu = isinstance(method, str) and method in cuml_methods
         params = dict(n_components=n_components)
+        # The randomized solver requires an integer number of components; 'mle' or a fraction of variance
+        # explained are left to Scikit-Learn's default solver
+        if method == "PCA" and not self._gpu and isinstance(n_components, (int, np.integer)):
+            params["svd_solver"] = "randomized"
+            params["random_state"] = 42
         params = {**params, **kwargs}
         try:
             if isinstance(method, str):
-                self.method = self.base_methods[method](**params)
+                if _accepts_n_jobs(methods[method]):
+                    params.setdefault("n_jobs", -1)
+                self.method = methods[method](**params)
             else:
                 self.method = method
         except KeyError:
@@ -129,12 +275,91 @@ class DimensionReduction:
                 e,
             )
         self.embeddings = None
-        self._method_name = type(self.method).__name__
+        self._base_method = isinstance(method, str)
+        self._method_name = method if isinstance(method, str) else type(self.method).__name__
+        self._faiss_knn = faiss_knn and isinstance(self.method, UMAP)
+        if self._faiss_knn and faiss is None:
+            raise ImportError("faiss_knn requires the faiss package to be installed")
+        if self._faiss_knn and self.method.metric != "euclidean":
+            raise ValueError("faiss_knn computes euclidean nearest neighbours; UMAP metric must be 'euclidean'")
 
     @property
     def name(self):
         return self._method_name
 
+    def _to_input(self, data: pd.DataFrame, features: List[str]):
+        if not self._base_method:
+            # Custom methods receive the data at its own precision
+            return data[features].values
+        # All base methods accept single precision; halves memory traffic in the KNN and gradient steps
+        x = np.ascontiguousarray(data[features].to_numpy(dtype=np.float32))
+        if self._gpu:
+            import cupy
+
+            return cupy.asarray(x)
+        return x
+
+    @staticmethod
+    def precompute_knn(
+        X: np.ndarray, k: int, m: int = 32, ef_construction: int = 200
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the k nearest neighbours (euclidean distance) of every row in X using an approximate
+        FAISS HNSW index. The data is indexed and queried against itself, so each point is usually returned as
+        its own nearest neighbour (as UMAP expects), but the approximate search does not guarantee this,
+        for example when there are duplicate events.
+
+        Parameters
+        ----------
+        X: Numpy.Array
+        k: int
+            Number of neighbours
+        m: int (default=32)
+            Number of connections per node in the HNSW graph
+        ef_construction: int (default=200)
+            Size of the candidate list when building the HNSW graph; larger values are slower but more accurate
+
+        Returns
+        -------
+        Tuple[Numpy.Array, Numpy.Array]
+            Indices and distances of nearest neighbours, each of shape (n, k)
+
+        Raises
+        ------
+        ImportError
+            faiss is not installed
+        """
+        if faiss is None:
+            raise ImportError("precompute_knn requires the faiss package to be installed")
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        index = faiss.IndexHNSWFlat(X.shape[1], m)
+        index.hnsw.efConstruction = ef_construction
+        index.hnsw.efSearch = max(k, 64)
+        index.add(X)
+        dists, indices = index.search(X, k)
+        # FAISS reports squared L2 distances
+        return indices.astype(np.int64), np.sqrt(np.maximum(dists, 0.0))
+
+    def _set_precomputed_knn(self, x: Optional[np.ndarray]):
+        if self._faiss_knn:
+            if x is None:
+                self.method.precomputed_knn = (None, None, None)
+                return
+            indices, dists = self.precompute_knn(x, k=self.method.n_neighbors)
+            self.method.precomputed_knn = (indices, dists, None)
+
+    def _to_output(self, embeddings) -> np.ndarray:
+        if self._gpu and hasattr(embeddings, "get"):
+            return embeddings.get()
+        return embeddings
+
+    def _add_embeddings(self, data: pd.DataFrame, embeddings: np.ndarray) -> pd.DataFrame:
+        # Columns of a C-contiguous matrix are strided views, whereas iterating over the transpose may copy
+        embeddings = np.ascontiguousarray(embeddings)
+        for i in range(embeddings.shape[1]):
+            data[f"{self._method_name}{i + 1}"] = embeddings[:, i]
+        return data
+
     def fit(self, data: pd.DataFrame, features: List[str]) -> Union[None, pd.DataFrame]:
         """
         Fit the underlying method. Will call 'fit_transform' if fit is not supported.
@@ -153,7 +378,9 @@ class DimensionReduction:
         if not hasattr(self.method, "fit"):
             logger.warning(f"Method {self._method_name} has no method 'fit', calling 'fit_transform' instead.")
             return self.fit_transform(data=data, features=features)
-        self.method.fit(data[features].values)
+        # A precomputed graph would leave UMAP unable to 'transform', so it is only used by fit_transform
+        self._set_precomputed_knn(None)
+        self.method.fit(self._to_input(data=data, features=features))
 
     def fit_transform(self, data: pd.DataFrame, features: List[str]) -> pd.DataFrame:
         """
@@ -170,11 +397,10 @@ class DimensionReduction:
         -------
         Pandas.DataFrame
         """
-        x = data[features].values
-        self.embeddings = self.method.fit_transform(x)
-        for i, e in enumerate(self.embeddings.T):
-            data[f"{self._method_name}{i + 1}"] = e
-        return data
+        x = self._to_input(data=data, features=features)
+        self._set_precomputed_knn(x)
+        self.embeddings = self._to_output(self.method.fit_transform(x))
+        return self._add_embeddings(data=data, embeddings=self.embeddings)
 
     def transform(self, data: pd.DataFrame, features: List[str]) -> pd.DataFrame:
         """
@@ -197,10 +423,8 @@ class DimensionReduction:
             logger.warning(f"Method {self._method_name} has no method 'transform', calling 'fit_transform' instead.")
             return self.fit_transform(data=data, features=features)
 
-        embeddings = self.method.transform(data[features].values)
-        for i, e in enumerate(embeddings.T):
-            data[f"{self._method_name}{i + 1}"] = e
-        return data
+        embeddings = self._to_output(self.method.transform(self._to_input(data=data, features=features)))
+        return self._add_embeddings(data=data, embeddings=embeddings)
 
 
 def dimension_reduction_with_sampling(
@@ -210,6 +434,7 @@ def dimension_reduction_with_sampling(
     sampling_size: Union[int, float],
     sampling_method: str = "uniform",
     sampling_kwargs: Optional[Dict] = None,
+    chunk_size: Optional[int] = None,
     verbose: bool = True,
     **kwargs,
 ) -> Tuple[pd.DataFrame, DimensionReduction]:
@@ -232,7 +457,11 @@ def dimension_reduction_with_sampling(
         How to down-sample the feature space
     sampling_kwargs: Dict, optional
         Additional keywords passed to cytopy.utils.sampling.sample_dataframe
+    chunk_size: int, optional
+        By default the data not used for training is transformed in a single call. If memory is limited,
+        provide the number of rows to transform at a time
     verbose: bool (default=True)
+        Show a progress bar when transforming in chunks
     kwargs:
         Additional keyword arguments passed to DimensionReduction
 
@@ -244,10 +473,22 @@ def dimension_reduction_with_sampling(
     sample = sample_dataframe(data=data, sample_size=sampling_size, method=sampling_method, **sampling_kwargs)
     reducer = DimensionReduction(method=method, **kwargs)
     reducer.fit(data=sample, features=features)
-    data_with_embeddings = reducer.transform(data=sample, features=features)
-    remaining_data = data[~data.index.isin(sample.index)]
-    for _, df in progress_bar(
-        remaining_data.groupby(np.arange(remaining_data.shape[0]) // sampling_size), verbose=verbose
-    ):
-        data_with_embeddings = pd.concat([data_with_embeddings, reducer.transform(data=df, features=features)])
+    embedded = [reducer.transform(data=sample, features=features)]
+    remaining = np.ones(data.shape[0], dtype=bool)
+    if data.index.is_unique:
+        # Positional lookup reuses the index's cached hash table rather than hashing the sample index
+        positions = data.index.get_indexer(sample.index)
+        remaining[positions[positions >= 0]] = False
+    else:
+        remaining[data.index.isin(sample.index)] = False
+    # 'take' copies the remaining rows without flagging the result as a slice of 'data', so embeddings can be
+    # assigned to it directly; chunks are sliced from it and copied for the same reason
+    remaining_data = data.take(np.flatnonzero(remaining))
+    if chunk_size is None:
+        embedded.append(reducer.transform(data=remaining_data, features=features))
+    else:
+        for start in progress_bar(range(0, remaining_data.shape[0], chunk_size), verbose=verbose):
+            df = remaining_data.iloc[start : start + chunk_size].copy()
+            embedded.append(reducer.transform(data=df, features=features))
+    data_with_embeddings = pd.concat(embedded)
     return data_with_embeddings.sort_index(axis=0), reducer
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from IPython import get_ipython
 from tqdm import tqdm
 from tqdm import tqdm_notebook
@@ -28,9 +30,11 @@ def progress_bar(x: iter, verbose: bool = True, **kwargs) -> callable:
     return tqdm(x, **kwargs)
 
 
+@lru_cache(maxsize=1)
 def which_environment() -> str:
     """
-    Test if module is being executed in the Jupyter environment.
+    Test if module is being executed in the Jupyter environment. The result is cached, as the
+    execution environment does not change within a session.
 
     Returns
     -------
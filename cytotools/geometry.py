@@ -27,31 +27,41 @@ CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
 TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
-from functools import partial
-from multiprocessing import cpu_count
-from multiprocessing import Pool
+import warnings
+from functools import lru_cache
 from typing import List
 from typing import Optional
+from typing import TYPE_CHECKING
 from typing import Tuple
 from typing import Union
 
-import alphashape
 import numpy as np
 import pandas as pd
-from matplotlib.patches import Ellipse
-from numba import jit
-from scipy import linalg
-from scipy import stats
-from shapely.geometry import Point
+from scipy.spatial import ConvexHull
+from scipy.spatial import Delaunay
+from scipy.spatial import QhullError
+from shapely import vectorized
+from shapely.errors import ShapelyDeprecationWarning
+from shapely.geometry import MultiLineString
 from shapely.geometry import Polygon
+from shapely.ops import polygonize
+from shapely.ops import unary_union
+from shapely.strtree import STRtree
 
+if TYPE_CHECKING:
+    from matplotlib.patches import Ellipse
 
-class GeometryError(Exception):
-    pass
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
 
+# Below this number of data points the overhead of numexpr outweighs the benefit of a fused expression
+NUMEXPR_MIN_SIZE = 100000
 
-def point_in_poly(coords: Tuple[float], poly: Polygon) -> bool:
-    return poly.contains(Point(coords))
+
+class GeometryError(Exception):
+    pass
 
 
 def inside_polygon(data: pd.DataFrame, x: str, y: str, poly: Polygon) -> pd.DataFrame:
@@ -74,8 +84,7 @@ def inside_polygon(data: pd.DataFrame, x: str, y: str, poly: Polygon) -> pd.Data
     Pandas.DataFrame
         Masked DataFrame containing only those rows that fall within the Polygon
     """
-    with Pool(cpu_count()) as pool:
-        mask = pool.map(partial(point_in_poly, poly=poly), data[[x, y]].values)
+    mask = vectorized.contains(poly, data[x].to_numpy(), data[y].to_numpy())
     return data.iloc[mask, :]
 
 
@@ -95,6 +104,10 @@ def polygon_overlap(poly1: Polygon, poly2: Polygon, threshold: float = 0.0) -> f
     -------
     float
     """
+    b1, b2 = poly1.bounds, poly2.bounds
+    # Cheap bounding box rejection before the full GEOS predicate
+    if b1[2] < b2[0] or b2[2] < b1[0] or b1[3] < b2[1] or b2[3] < b1[1]:
+        return 0.0
     if poly1.intersects(poly2):
         overlap = float(poly1.intersection(poly2).area / poly1.area)
         if overlap >= threshold:
@@ -102,14 +115,45 @@ def polygon_overlap(poly1: Polygon, poly2: Polygon, threshold: float = 0.0) -> f
     return 0.0
 
 
-@jit(nopython=True)
+def polygon_overlap_matrix(polys: List[Polygon], threshold: float = 0.0) -> np.ndarray:
+    """
+    Compute the fraction overlap (see polygon_overlap) between every pair of polygons in the given list.
+    An STRtree spatial index is used so that intersections are only computed for polygons whose
+    bounding boxes overlap. Supports both Shapely 1.8 (STRtree.query_items) and Shapely 2
+    (STRtree.query returning indices).
+
+    Parameters
+    ----------
+    polys: List[Polygon]
+    threshold: float (default = 0.0)
+
+    Returns
+    -------
+    Numpy.Array
+        Matrix of shape (n, n) where element [i, j] is the fraction of polys[i] that overlaps polys[j]
+    """
+    overlaps = np.zeros((len(polys), len(polys)), dtype=np.float64)
+    with warnings.catch_warnings():
+        # Shapely 1.8 warns that the STRtree API changes in Shapely 2; both APIs are handled below
+        warnings.simplefilter("ignore", category=ShapelyDeprecationWarning)
+        tree = STRtree(polys)
+        for i, poly in enumerate(polys):
+            if hasattr(tree, "query_items"):
+                candidates = tree.query_items(poly)
+            else:
+                candidates = tree.query(poly, predicate="intersects")
+            for j in candidates:
+                overlaps[i, j] = polygon_overlap(poly, polys[j], threshold=threshold)
+    return overlaps
+
+
 def inside_ellipse(
-    data: np.array,
+    data: np.ndarray,
     center: Tuple[float, float],
     width: Union[int, float],
     height: Union[int, float],
     angle: Union[int, float],
-) -> List[bool]:
+) -> np.ndarray:
     """
     Return mask of two-dimensional matrix specifying if a data point (row) falls
     within an ellipse
@@ -129,32 +173,35 @@ def inside_ellipse(
 
     Returns
     --------
-    List[bool]
+    numpy.ndarray
+        Boolean mask, True where the data point falls within the ellipse
     """
     cos_angle = np.cos(np.radians(180.0 - angle))
     sin_angle = np.sin(np.radians(180.0 - angle))
 
-    x = data[:, 0]
-    y = data[:, 1]
+    if ne is not None and data.shape[0] >= NUMEXPR_MIN_SIZE:
+        return ne.evaluate(
+            "((x - cx) * ca - (y - cy) * sa) ** 2 / w2 + ((x - cx) * sa + (y - cy) * ca) ** 2 / h2 <= 1.0",
+            local_dict=dict(
+                x=data[:, 0],
+                y=data[:, 1],
+                cx=float(center[0]),
+                cy=float(center[1]),
+                ca=cos_angle,
+                sa=sin_angle,
+                w2=0.25 * width * width,
+                h2=0.25 * height * height,
+            ),
+        )
 
-    xc = x - center[0]
-    yc = y - center[1]
+    xc = data[:, 0] - center[0]
+    yc = data[:, 1] - center[1]
 
     xct = xc * cos_angle - yc * sin_angle
     yct = xc * sin_angle + yc * cos_angle
 
-    rad_cc = (xct ** 2 / (width / 2.0) ** 2) + (yct ** 2 / (height / 2.0) ** 2)
-
-    in_ellipse = []
-
-    for r in rad_cc:
-        if r <= 1.0:
-            # point in ellipse
-            in_ellipse.append(True)
-        else:
-            # point not in ellipse
-            in_ellipse.append(False)
-    return in_ellipse
+    rad_cc = (xct * xct) / (0.25 * width * width) + (yct * yct) / (0.25 * height * height)
+    return rad_cc <= 1.0
 
 
 def probabilistic_ellipse(covariances: np.ndarray, conf: float) -> Tuple[float, float, float]:
@@ -174,14 +221,39 @@ def probabilistic_ellipse(covariances: np.ndarray, conf: float) -> Tuple[float,
     Tuple[float, float, float]
         Width, Height and Angle of ellipse
     """
-    eigen_val, eigen_vec = linalg.eigh(covariances)
-    chi2 = stats.chi2.ppf(conf, 2)
-    eigen_val = 2.0 * np.sqrt(eigen_val) * np.sqrt(chi2)
-    u = eigen_vec[0] / linalg.norm(eigen_vec[0])
-    angle = 180.0 * np.arctan(u[1] / u[0]) / np.pi
+    # Closed form eigen decomposition of the symmetric 2x2 covariance matrix
+    a, b, c = covariances[0, 0], covariances[0, 1], covariances[1, 1]
+    disc = np.hypot((a - c) / 2.0, b)
+    eigen_val = np.array([(a + c) / 2.0 - disc, (a + c) / 2.0 + disc])
+    # The quantile function of the chi-squared distribution with two degrees of freedom is -2ln(1 - p)
+    chi2 = -2.0 * np.log1p(-conf)
+    eigen_val = 2.0 * np.sqrt(np.maximum(eigen_val, 0.0)) * np.sqrt(chi2)
+    # Orientation of the minor axis (the eigenvector of the smallest eigenvalue), in the range [-90, 90)
+    angle = (np.degrees(0.5 * np.arctan2(2.0 * b, a - c)) + 180.0) % 180.0 - 90.0
     return eigen_val[0], eigen_val[1], (180.0 + angle)
 
 
+@lru_cache(maxsize=32)
+def _delaunay_simplices(xy: bytes, n: int, d: int) -> np.ndarray:
+    """
+    Delaunay triangulation of a cloud of data points, cached so that repeated calls to create_envelope
+    for the same data (e.g. when searching for a suitable alpha) only triangulate once.
+
+    Parameters
+    ----------
+    xy: bytes
+        Raw bytes of a C-contiguous float64 array of shape (n, d)
+    n: int
+    d: int
+
+    Returns
+    -------
+    Numpy.Array
+        Indices of the points forming each simplex
+    """
+    return Delaunay(np.frombuffer(xy, dtype=np.float64).reshape(n, d)).simplices
+
+
 def create_envelope(xy: np.ndarray, alpha: Optional[float] = 0.0) -> Polygon:
     """
     Given the x and y coordinates of a cloud of data points generate an envelope (alpha shape)
@@ -206,14 +278,32 @@ def create_envelope(xy: np.ndarray, alpha: Optional[float] = 0.0) -> Polygon:
     GeometryError
         Failed to generate alpha shape; likely due to insufficient data or alpha being too large.
     """
+    xy = np.ascontiguousarray(xy, dtype=np.float64)
     try:
-        poly = alphashape.alphashape(points=xy, alpha=alpha)
-        assert isinstance(poly, Polygon)
-        return poly
-    except AssertionError:
+        if alpha is None or alpha <= 0:
+            return Polygon(xy[ConvexHull(xy).vertices])
+        simplices = _delaunay_simplices(xy.tobytes(), *xy.shape)
+    except (QhullError, ValueError):
+        raise GeometryError("Failed to generate alpha shape. Check for insufficient data.")
+    triangles = xy[simplices]
+    a = np.linalg.norm(triangles[:, 0] - triangles[:, 1], axis=1)
+    b = np.linalg.norm(triangles[:, 1] - triangles[:, 2], axis=1)
+    c = np.linalg.norm(triangles[:, 2] - triangles[:, 0], axis=1)
+    u, v = triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+    area = 0.5 * np.abs(u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        circumradius = (a * b * c) / (4.0 * area)
+    simplices = simplices[circumradius < 1.0 / alpha]
+    # Edges shared by two triangles are internal, those that appear once form the perimeter
+    edges = np.sort(np.concatenate([simplices[:, [0, 1]], simplices[:, [1, 2]], simplices[:, [2, 0]]]), axis=1)
+    edges, counts = np.unique(edges, axis=0, return_counts=True)
+    perimeter = MultiLineString([xy[edge] for edge in edges[counts == 1]])
+    poly = unary_union(list(polygonize(perimeter)))
+    if not isinstance(poly, Polygon):
         raise GeometryError(
             "Failed to generate alpha shape. Check for insufficient data or whether alpha is too large."
         )
+    return poly
 
 
 def ellipse_to_polygon(
@@ -221,7 +311,8 @@ def ellipse_to_polygon(
     width: float,
     height: float,
     angle: float,
-    ellipse: Optional[Ellipse] = None,
+    ellipse: Optional["Ellipse"] = None,
+    n_vertices: int = 72,
 ) -> Polygon:
     """
     Convert an ellipse to a shapely Polygon object.
@@ -232,12 +323,25 @@ def ellipse_to_polygon(
     width: float
     height: float
     angle: float
-    ellipse: Ellipse, optional
+        Rotation of the ellipse in degrees anti-clockwise
+    ellipse: matplotlib.patches.Ellipse, optional
+        Deprecated; if given, the vertices of this matplotlib Ellipse are used
+    n_vertices: int (default=72)
+        Number of vertices used to approximate the ellipse
 
     Returns
     -------
     shapely.geometry.Polygon
     """
-    ellipse = ellipse or Ellipse(centroid, width, height, angle)
-    vertices = ellipse.get_verts()
-    return Polygon(vertices)
+    if ellipse is not None:
+        warnings.warn(
+            "The 'ellipse' argument of ellipse_to_polygon is deprecated and will be removed in a future release",
+            DeprecationWarning,
+        )
+        return Polygon(ellipse.get_verts())
+    t = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+    a, b = width / 2.0, height / 2.0
+    cos_angle, sin_angle = np.cos(np.radians(angle)), np.sin(np.radians(angle))
+    x = centroid[0] + a * np.cos(t) * cos_angle - b * np.sin(t) * sin_angle
+    y = centroid[1] + a * np.cos(t) * sin_angle + b * np.sin(t) * cos_angle
+    return Polygon(np.column_stack([x, y]))
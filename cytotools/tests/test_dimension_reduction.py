@@ -1,6 +1,7 @@
 from ..read import read_from_disk, polars_to_pandas
 from .. import dimension_reduction
 from . import assets
+import numpy as np
 import pytest
 
 from umap import UMAP
@@ -32,3 +33,70 @@ def test_dimension_reduction_with_sampling():
     assert data_with_embeddings.shape[0] == 10000
     assert set(data.index.values) == set(data_with_embeddings.index.values)
     assert all([x in data_with_embeddings.columns for x in ["UMAP1", "UMAP2"]])
+
+
+def test_dimension_reduction_backend():
+    with pytest.raises(ValueError):
+        dimension_reduction.DimensionReduction(method="UMAP", backend="invalid")
+    if dimension_reduction._try_cuml() is None:
+        reducer = dimension_reduction.DimensionReduction(method="PCA", backend="cuml")
+        assert isinstance(reducer.method, dimension_reduction.PCA)
+
+
+def test_dimension_reduction_pca_solver():
+    reducer = dimension_reduction.DimensionReduction(method="PCA")
+    assert reducer.method.svd_solver == "randomized"
+    reducer = dimension_reduction.DimensionReduction(method="PCA", svd_solver="full")
+    assert reducer.method.svd_solver == "full"
+    data = polars_to_pandas(read_from_disk(f"{assets.__path__._path[0]}/levine32.csv")).sample(n=1000)
+    for n_components in [0.9, "mle"]:
+        reducer = dimension_reduction.DimensionReduction(method="PCA", n_components=n_components)
+        assert reducer.method.svd_solver == "auto"
+    reducer = dimension_reduction.DimensionReduction(method="PCA", n_components=0.9)
+    reducer.fit(data=data, features=data.columns.tolist())
+
+
+def test_dimension_reduction_with_sampling_chunked():
+    data = polars_to_pandas(read_from_disk(f"{assets.__path__._path[0]}/levine32.csv")).sample(n=5000)
+    data_with_embeddings, reducer = dimension_reduction.dimension_reduction_with_sampling(
+        data=data,
+        features=data.columns.tolist(),
+        method="PCA",
+        sampling_size=1000,
+        chunk_size=1500
+    )
+    assert data_with_embeddings.shape[0] == 5000
+    assert set(data.index.values) == set(data_with_embeddings.index.values)
+    assert all([x in data_with_embeddings.columns for x in ["PCA1", "PCA2"]])
+
+
+def test_dimension_reduction_faiss_knn():
+    pytest.importorskip("faiss")
+    # UMAP ignores precomputed_knn below 4096 rows
+    data = polars_to_pandas(read_from_disk(f"{assets.__path__._path[0]}/levine32.csv")).sample(n=5000)
+    indices, dists = dimension_reduction.DimensionReduction.precompute_knn(data.values, k=15)
+    assert indices.shape == dists.shape == (5000, 15)
+    reducer = dimension_reduction.DimensionReduction(method="UMAP", faiss_knn=True)
+    data_with_embeddings = reducer.fit_transform(data=data, features=data.columns.tolist())
+    assert all([x in data_with_embeddings.columns for x in ["UMAP1", "UMAP2"]])
+    assert np.array_equal(reducer.method.knn_indices, reducer.method.precomputed_knn[0])
+    reducer.fit(data=data, features=data.columns.tolist())
+    assert reducer.method.precomputed_knn[0] is None
+    with pytest.raises(ValueError):
+        dimension_reduction.DimensionReduction(method="UMAP", faiss_knn=True, metric="cosine")
+
+
+@pytest.mark.parametrize("method", ["UMAP", "KernelPCA", "MDS", "Isomap"])
+def test_dimension_reduction_n_jobs(method):
+    reducer = dimension_reduction.DimensionReduction(method=method)
+    assert reducer.method.n_jobs == -1
+    reducer = dimension_reduction.DimensionReduction(method=method, n_jobs=1)
+    assert reducer.method.n_jobs == 1
+
+
+def test_opentsne_sklearn_kwargs():
+    pytest.importorskip("openTSNE")
+    reducer = dimension_reduction.DimensionReduction(method="TSNE", init="random", angle=0.5)
+    assert isinstance(reducer.method, dimension_reduction.OpenTSNE)
+    with pytest.raises(TypeError):
+        dimension_reduction.DimensionReduction(method="TSNE", min_grad_norm=1e-7)
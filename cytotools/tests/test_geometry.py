@@ -1,12 +1,19 @@
 import numpy as np
+import pandas as pd
 import pytest
+from shapely.geometry import Point
 from shapely.geometry import Polygon
 from sklearn.datasets import make_blobs
 from sklearn.mixture import GaussianMixture
 
+from .. import geometry
 from ..geometry import create_envelope
+from ..geometry import ellipse_to_polygon
+from ..geometry import GeometryError
 from ..geometry import inside_ellipse
+from ..geometry import inside_polygon
 from ..geometry import polygon_overlap
+from ..geometry import polygon_overlap_matrix
 from ..geometry import probabilistic_ellipse
 
 
@@ -31,6 +38,29 @@ def test_polygon_overlap(poly1, poly2, expected):
     assert polygon_overlap(poly1, poly2, threshold=0.6) == 0.0
 
 
+def test_polygon_overlap_matrix():
+    polys = [
+        Polygon(np.array([[0, 4.0], [10, 4.0], [10, 8.2], [0, 8.2], [0, 4.0]])),
+        Polygon(np.array([[0, 4.0], [5, 4.0], [5, 8.2], [0, 8.2], [0, 4.0]])),
+        Polygon(np.array([[12, 4.0], [15, 4.0], [15, 8.2], [12, 8.2], [12, 4.0]])),
+    ]
+    overlaps = polygon_overlap_matrix(polys)
+    assert overlaps.shape == (3, 3)
+    expected = [[polygon_overlap(a, b) for b in polys] for a in polys]
+    assert np.allclose(overlaps, expected)
+    assert overlaps[0, 1] == pytest.approx(0.5)
+    assert overlaps[1, 0] == pytest.approx(1.0)
+    assert np.allclose(polygon_overlap_matrix(polys, threshold=0.6), [[1, 0, 0], [1, 1, 0], [0, 0, 1]])
+
+
+def test_inside_polygon():
+    data = pd.DataFrame({"x": [1.0, 5.0, 11.0, 2.0, -1.0], "y": [5.0, 7.5, 5.0, 9.0, 4.5]})
+    poly = Polygon(np.array([[0, 4.0], [10, 4.0], [10, 8.2], [0, 8.2], [0, 4.0]]))
+    inside = inside_polygon(data=data, x="x", y="y", poly=poly)
+    assert isinstance(inside, pd.DataFrame)
+    assert inside.index.tolist() == [0, 1]
+
+
 def test_create_envelope():
     test_data = make_blobs(n_samples=1000, n_features=2, centers=1, center_box=(0, 5), random_state=42)[0]
     x, y = test_data[:, 0], test_data[:, 1]
@@ -46,6 +76,20 @@ def test_create_envelope():
             assert s <= np.max(envelope.exterior.xy[idx])
 
 
+@pytest.mark.parametrize("alpha", [0.1, 0.5, 1.0])
+def test_create_envelope_concave(alpha):
+    test_data = make_blobs(n_samples=1000, n_features=2, centers=1, center_box=(0, 5), random_state=42)[0]
+    envelope = create_envelope(test_data, alpha=alpha)
+    assert isinstance(envelope, Polygon)
+    assert envelope.area <= create_envelope(test_data).area + 1e-9
+
+
+def test_create_envelope_collinear():
+    test_data = np.column_stack([np.arange(10.0), np.arange(10.0)])
+    with pytest.raises(GeometryError):
+        create_envelope(test_data, alpha=1.0)
+
+
 @pytest.mark.parametrize("conf", [0.95, 0.8, 0.5])
 def test_probablistic_ellipse(conf):
     test_data = make_blobs(n_samples=1000, n_features=2, centers=1, center_box=(1, 5), random_state=42)[0]
@@ -68,5 +112,24 @@ def test_probablistic_ellipse(conf):
 def test_inside_ellipse(test_data, expected_mask):
     center, width, height, angle = (5, 5), 10, 5, 15
     mask = inside_ellipse(data=test_data, center=center, width=width, height=height, angle=angle)
-    assert isinstance(mask, list)
+    assert isinstance(mask, np.ndarray)
     assert np.array_equal(mask, expected_mask)
+
+
+def test_ellipse_to_polygon():
+    poly = ellipse_to_polygon(centroid=(5, 5), width=10, height=5, angle=15)
+    assert isinstance(poly, Polygon)
+    assert poly.area == pytest.approx(np.pi * 5 * 2.5, rel=0.01)
+    assert poly.centroid.x == pytest.approx(5) and poly.centroid.y == pytest.approx(5)
+    test_data = np.array([[3, 4.5], [7.5, 9], [6.2, 4.3]])
+    mask = inside_ellipse(data=test_data, center=(5, 5), width=10, height=5, angle=15)
+    assert np.array_equal(mask, [poly.contains(Point(p)) for p in test_data])
+
+
+def test_inside_ellipse_large(monkeypatch):
+    pytest.importorskip("numexpr")
+    test_data = np.random.default_rng(42).normal(loc=5, scale=3, size=(geometry.NUMEXPR_MIN_SIZE, 2))
+    mask = inside_ellipse(data=test_data, center=(5, 5), width=10, height=5, angle=15)
+    monkeypatch.setattr(geometry, "ne", None)
+    expected = inside_ellipse(data=test_data, center=(5, 5), width=10, height=5, angle=15)
+    assert np.array_equal(mask, expected)
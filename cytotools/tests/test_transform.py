@@ -1,57 +1,118 @@
+from functools import lru_cache
+
+import numpy as np
 import pandas.testing as pd_testing
+import polars as pl
 from ..read import read_from_disk, polars_to_pandas
 from .. import transform
 from . import assets
 import pytest
 
 
-@pytest.fixture()
+@lru_cache(maxsize=None)
+def _make(cls):
+    # Transformers are not mutated by scale/inverse_scale so one instance per class can be shared
+    return cls()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def warm_numba_kernels():
+    # Compile (or load from the on-disk cache) the asinh kernels once, rather than in the first test to use them
+    for dtype in (np.float64, np.float32):
+        warm = np.ones(4, dtype=dtype)
+        transform._asinh(warm, dtype(150.0))
+        transform._inverse_asinh(warm, dtype(150.0))
+
+
+@pytest.fixture(scope="session")
 def dummy_data():
+    # Read once per session; no test mutates the DataFrame (transforms return new frames)
     return polars_to_pandas(read_from_disk(f"{assets.__path__._path[0]}/test.fcs"))
 
 
+@pytest.fixture(scope="session")
+def dummy_features(dummy_data):
+    return dummy_data.columns.tolist()
+
+
+@pytest.fixture(scope="session")
+def dummy_pl():
+    return read_from_disk(f"{assets.__path__._path[0]}/test.fcs")
+
+
+@pytest.fixture(scope="session")
+def dummy_arr():
+    data = read_from_disk(f"{assets.__path__._path[0]}/test.fcs").drop("Index")
+    return data.to_numpy(), data.columns
+
+
 @pytest.mark.parametrize(
     "transformer",
     [transform.LogicleTransformer, transform.AsinhTransformer, transform.HyperlogTransformer]
 )
-def test_transformers(dummy_data, transformer):
-    transformer = transformer()
-    transformed = transformer.scale(data=dummy_data, features=dummy_data.columns.tolist())
+def test_transformers(dummy_data, dummy_features, transformer):
+    transformer = _make(transformer)
+    transformed = transformer.scale(data=dummy_data, features=dummy_features)
     assert ((transformed.mean() < 10) & (transformed.mean() > -1)).all()
-    inverse = transformer.inverse_scale(data=transformed, features=transformed.columns.tolist())
-    pd_testing.assert_frame_equal(inverse, dummy_data)
+    inverse = transformer.inverse_scale(data=transformed, features=dummy_features)
+    assert list(inverse.columns) == dummy_features
+    np.testing.assert_allclose(inverse.to_numpy(), dummy_data.to_numpy(), rtol=1e-5, atol=1e-8)
 
 
 @pytest.mark.parametrize(
-    "method,return_transformer,features,kwargs",
-    [
-        ("logicle", True, None, {}),
-        ("logicle", True, None, {"w": 1.0}),
-        ("logicle", False, ["FSC-A", "SSC-A"], {"m": 5.0}),
-        ("asinh", True, None, {}),
-        ("asinh", True, None, {"cofactor": 150}),
-        ("asinh", False, ["FSC-A", "SSC-A"], {"cofactor": 100}),
-    ]
+    "transformer",
+    [transform.LogicleTransformer, transform.AsinhTransformer, transform.HyperlogTransformer]
 )
-def test_apply_transform(dummy_data, method, return_transformer, features, kwargs):
-    features = dummy_data.columns.tolist() if features is None else features
-    if return_transformer:
-        data, transformer = transform.apply_transform(
-            data=dummy_data,
-            features=features,
-            method=method,
-            return_transformer=return_transformer,
-            **kwargs
-        )
-        assert isinstance(transformer, transform.TRANSFORMERS.get(method))
-    else:
-        data = transform.apply_transform(
-            data=dummy_data,
-            features=features,
-            method=method,
-            **kwargs
-        )
-    assert ((data[features].mean() < 10) & (data[features].mean() > -1)).all()
+def test_transformers_array(dummy_arr, transformer):
+    arr, columns = dummy_arr
+    transformer = _make(transformer)
+    transformed = transformer.scale(data=arr, features=list(range(len(columns))))
+    assert isinstance(transformed, np.ndarray)
+    assert ((transformed.mean(axis=0) < 10) & (transformed.mean(axis=0) > -1)).all()
+    inverse = transformer.inverse_scale(data=transformed, features=list(range(len(columns))))
+    np.testing.assert_allclose(inverse, arr)
+
+
+APPLY_TRANSFORM_CASES = [
+    ("logicle", True, None, {}),
+    ("logicle", True, None, {"w": 1.0}),
+    ("logicle", False, ["FSC-A", "SSC-A"], {"m": 5.0}),
+    ("asinh", True, None, {}),
+    ("asinh", True, None, {"cofactor": 150}),
+    ("asinh", False, ["FSC-A", "SSC-A"], {"cofactor": 100}),
+]
+
+
+def test_apply_transform(dummy_data, dummy_features):
+    for method, return_transformer, features, kwargs in APPLY_TRANSFORM_CASES:
+        features = dummy_features if features is None else features
+        if return_transformer:
+            data, transformer = transform.apply_transform(
+                data=dummy_data,
+                features=features,
+                method=method,
+                return_transformer=return_transformer,
+                **kwargs
+            )
+            assert isinstance(transformer, transform.TRANSFORMERS.get(method))
+        else:
+            data = transform.apply_transform(
+                data=dummy_data,
+                features=features,
+                method=method,
+                **kwargs
+            )
+        means = data[features].mean()
+        assert ((means < 10) & (means > -1)).all(), f"{method} {kwargs}"
+
+
+@pytest.mark.parametrize("method", ["logicle", "asinh"])
+def test_apply_transform_polars(dummy_data, dummy_pl, method):
+    features = ["FSC-A", "SSC-A"]
+    data = transform.apply_transform(data=dummy_pl, features=features, method=method, return_polars=True)
+    assert isinstance(data, pl.DataFrame)
+    expected = transform.apply_transform(data=dummy_data, features=features, method=method)
+    np.testing.assert_allclose(data[features].to_numpy(), expected[features].to_numpy())
 
 
 def test_apply_transform_map(dummy_data):
@@ -68,3 +129,31 @@ def test_apply_transform_map(dummy_data):
     pd_testing.assert_series_equal(dummy_data["FSC-A"], data["FSC-A"])
     assert -1 < data["PE-Cy7-A"].mean() < 1.
     assert -1 < data["7-AAD-A"].mean() < 6.
+
+
+@pytest.mark.parametrize("base", ["parametrized", 10, 2, "natural"])
+def test_log_transformer(base):
+    arr = np.random.default_rng(42).uniform(10.0, 262144.0, size=(1000, 2))
+    transformer = transform.LogTransformer(base=base)
+    transformed = transformer.scale(data=arr, features=[0, 1])
+    inverse = transformer.inverse_scale(data=transformed, features=[0, 1])
+    np.testing.assert_allclose(inverse, arr)
+
+
+def test_logicle_transformer_lut(dummy_arr):
+    arr, columns = dummy_arr
+    features = list(range(len(columns)))
+    exact = transform.LogicleTransformer().scale(data=arr, features=features)
+    interpolated = transform.LogicleTransformer(lut_size=65536).scale(data=arr, features=features)
+    np.testing.assert_allclose(interpolated, exact, atol=1e-4)
+    with pytest.raises(ValueError):
+        transform.LogicleTransformer(lut_size=1)
+
+
+def test_asinh_transformer_float32(dummy_arr):
+    arr, columns = dummy_arr
+    features = list(range(len(columns)))
+    transformer = transform.AsinhTransformer()
+    transformed = transformer.scale(data=arr.astype(np.float32), features=features)
+    assert transformed.dtype == np.float32
+    np.testing.assert_allclose(transformed, transformer.scale(data=arr, features=features), rtol=1e-5, atol=1e-6)
@@ -33,6 +33,7 @@ from functools import partial
 from typing import Callable
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 from typing import Union
 
@@ -40,6 +41,8 @@ import numpy as np
 import pandas as pd
 import polars as pl
 from flowutils import transforms
+from numba import njit
+from numba import prange
 from sklearn import preprocessing
 
 from .read import pandas_to_polars
@@ -47,6 +50,9 @@ from .read import polars_to_pandas
 
 logger = logging.getLogger(__name__)
 
+_LN10 = np.log(10.0)
+_LN2 = np.log(2.0)
+
 
 class TransformError(Exception):
     def __init__(self, message: str):
@@ -55,27 +61,62 @@ class TransformError(Exception):
 
 
 def logicle_transform_series(series: pl.Series, **kwargs):
-    return pl.Series(transforms._logicle(series.to_numpy(), **kwargs))
+    return pl.Series(transforms._logicle(series.to_numpy().astype(np.float64, copy=False), **kwargs))
+
+
+def interpolated_logicle_transform_series(series: pl.Series, lut: Tuple[np.ndarray, np.ndarray], **kwargs):
+    x = np.asarray(series, dtype=np.float64)
+    grid, values = lut
+    y = np.interp(x, grid, values)
+    # Values beyond the range of the lookup table are transformed exactly
+    outside = (x < grid[0]) | (x > grid[-1])
+    if outside.any():
+        y[outside] = transforms._logicle(x[outside], **kwargs)
+    return pl.Series(y)
 
 
 def inverse_logicle_transform_series(series: pl.Series, **kwargs):
-    return pl.Series(transforms._logicle_inverse(series.to_numpy(), **kwargs))
+    return pl.Series(transforms._logicle_inverse(series.to_numpy().astype(np.float64, copy=False), **kwargs))
 
 
 def hyperlog_transform_series(series: pl.Series, **kwargs):
-    return pl.Series(transforms._hyperlog(series.to_numpy(), **kwargs))
+    return pl.Series(transforms._hyperlog(series.to_numpy().astype(np.float64, copy=False), **kwargs))
 
 
 def inverse_hyperlog_transform_series(series: pl.Series, **kwargs):
-    return pl.Series(transforms._hyperlog_inverse(series.to_numpy(), **kwargs))
+    return pl.Series(transforms._hyperlog_inverse(series.to_numpy().astype(np.float64, copy=False), **kwargs))
+
+
+@njit(parallel=True, cache=True)
+def _asinh(x: np.ndarray, cofactor: float) -> np.ndarray:
+    out = np.empty_like(x)
+    for i in prange(x.shape[0]):
+        out[i] = np.arcsinh(x[i] / cofactor)
+    return out
+
+
+@njit(parallel=True, cache=True)
+def _inverse_asinh(x: np.ndarray, cofactor: float) -> np.ndarray:
+    out = np.empty_like(x)
+    for i in prange(x.shape[0]):
+        out[i] = np.sinh(x[i]) * cofactor
+    return out
+
+
+def _as_float_array(x) -> np.ndarray:
+    # Single precision input is kept as is, halving memory traffic; anything else is promoted to float64
+    x = np.asarray(x)
+    return x if x.dtype == np.float32 else x.astype(np.float64, copy=False)
 
 
 def asinh_transformed_series(series: pl.Series, cofactor: float = 150.0):
-    return np.arcsinh(series / cofactor)
+    x = _as_float_array(series)
+    return pl.Series(_asinh(x, x.dtype.type(cofactor)))
 
 
 def inverse_asinh_transformed_series(series: pl.Series, cofactor: float = 150.0):
-    return np.sinh(series) * cofactor
+    x = _as_float_array(series)
+    return pl.Series(_inverse_asinh(x, x.dtype.type(cofactor)))
 
 
 class Transformer:
@@ -106,18 +147,36 @@ class Transformer:
         self.inverse = partial(inverse_function, **kwargs)
         self.kwargs = kwargs or {}
 
-    def scale(self, data: Union[pd.DataFrame, pl.DataFrame], features: List[str]) -> pd.DataFrame:
+    @staticmethod
+    def _map_array(func: Callable, data: np.ndarray, features: List[int]) -> np.ndarray:
+        # Copy into column-major order so that each feature is a contiguous block of memory
+        data = np.array(_as_float_array(data), order="F")
+        for i in features:
+            data[:, i] = np.asarray(func(pl.Series(data[:, i])))
+        return data
+
+    def scale(
+        self,
+        data: Union[pd.DataFrame, pl.DataFrame, np.ndarray],
+        features: Union[List[str], List[int]],
+        return_polars: bool = False,
+    ) -> Union[pd.DataFrame, pl.DataFrame, np.ndarray]:
         """
-        Scale features (columns) of given dataframe
+        Scale features (columns) of given dataframe. A two-dimensional Numpy.Array may be given in place of
+        a DataFrame, in which case features should be column indices and a transformed copy of the array
+        is returned.
 
         Parameters
         ----------
-        data: polars.DataFrame
+        data: polars.DataFrame, Pandas.DataFrame or Numpy.Array
         features: list
+        return_polars: bool (default=False)
+            If True, return a polars.DataFrame rather than converting the result to Pandas. Ignored if data
+            is a Numpy.Array
 
         Returns
         -------
-        Pandas.DataFrame
+        Pandas.DataFrame, polars.DataFrame or Numpy.Array
 
         Raises
         ------
@@ -127,23 +186,34 @@ class Transformer:
         """
         if data.shape[0] == 0:
             return data
+        if isinstance(data, np.ndarray):
+            return self._map_array(self.transform, data=data, features=features)
         data = data if isinstance(data, pl.DataFrame) else pandas_to_polars(data=data)
         data = data.with_columns([pl.col(x).map(self.transform) for x in features])
-        return polars_to_pandas(data=data)
+        return data if return_polars else polars_to_pandas(data=data)
 
-    def inverse_scale(self, data: Union[pd.DataFrame, pl.DataFrame], features: list) -> pd.DataFrame:
+    def inverse_scale(
+        self,
+        data: Union[pd.DataFrame, pl.DataFrame, np.ndarray],
+        features: Union[List[str], List[int]],
+        return_polars: bool = False,
+    ) -> Union[pd.DataFrame, pl.DataFrame, np.ndarray]:
         """
         Apply inverse scale to features (columns) of given dataframe, under the assumption that
-        these features have previously been transformed with this Transformer
+        these features have previously been transformed with this Transformer. A two-dimensional Numpy.Array
+        may be given in place of a DataFrame, in which case features should be column indices.
 
         Parameters
         ----------
-        data: polars.DataFrame
+        data: polars.DataFrame, Pandas.DataFrame or Numpy.Array
         features: list
+        return_polars: bool (default=False)
+            If True, return a polars.DataFrame rather than converting the result to Pandas. Ignored if data
+            is a Numpy.Array
 
         Returns
         -------
-        Pandas.DataFrame
+        Pandas.DataFrame, polars.DataFrame or Numpy.Array
 
         Raises
         ------
@@ -153,9 +223,11 @@ class Transformer:
         """
         if data.shape[0] == 0:
             return data
+        if isinstance(data, np.ndarray):
+            return self._map_array(self.inverse, data=data, features=features)
         data = data if isinstance(data, pl.DataFrame) else pandas_to_polars(data=data)
         data = data.with_columns([pl.col(x).map(self.inverse) for x in features])
-        return polars_to_pandas(data=data)
+        return data if return_polars else polars_to_pandas(data=data)
 
 
 class LogicleTransformer(Transformer):
@@ -182,9 +254,21 @@ class LogicleTransformer(Transformer):
         Additional number of negative decades
     t: int (default=262144)
         Top of the linear scale
+    lut_size: int, optional
+        If given, a lookup table of this many points spanning the logicle scale is computed on initialisation
+        and the forward transform is evaluated by linear interpolation of this table (values outside the
+        table are transformed exactly). This is much faster for large datasets at a small cost in accuracy
+        (65536 points is a sensible choice). The inverse transform is always exact.
+
+    Raises
+    ------
+    ValueError
+        lut_size is less than 2
     """
 
-    def __init__(self, w: float = 0.5, m: float = 4.5, a: float = 0.0, t: int = 262144):
+    def __init__(
+        self, w: float = 0.5, m: float = 4.5, a: float = 0.0, t: int = 262144, lut_size: Optional[int] = None
+    ):
         super().__init__(
             transform_function=logicle_transform_series,
             inverse_function=inverse_logicle_transform_series,
@@ -193,6 +277,13 @@ class LogicleTransformer(Transformer):
             a=a,
             t=t,
         )
+        if lut_size is not None:
+            if lut_size < 2:
+                raise ValueError("lut_size must be at least 2")
+            # Uniform in the transformed space so that the table is dense where the scale is log-like
+            values = np.linspace(0.0, 1.0, lut_size)
+            grid = transforms._logicle_inverse(values, w=w, m=m, a=a, t=t)
+            self.transform = partial(interpolated_logicle_transform_series, lut=(grid, values), w=w, m=m, a=a, t=t)
 
 
 class HyperlogTransformer(Transformer):
@@ -278,20 +369,21 @@ class LogTransformer(Transformer):
         t: int = 262144,
         **kwargs,
     ):
+        # Inverses use exp(x * ln(base)) which is considerably faster than raising to a power
         if base == "parametrized":
             super().__init__(
                 transform_function=lambda x: (1.0 / m) * np.log10(x / t) + 1.0,
-                inverse_function=lambda x: t * (10 ** ((x - 1) * m)),
+                inverse_function=lambda x: t * np.exp((x - 1) * (m * _LN10)),
             )
         elif base == 10:
             super().__init__(
                 transform_function=partial(np.log10, **kwargs),
-                inverse_function=lambda x: 10 ** x,
+                inverse_function=lambda x: np.exp(x * _LN10),
             )
         elif base == 2:
             super().__init__(
                 transform_function=partial(np.log2, **kwargs),
-                inverse_function=lambda x: 2 ** x,
+                inverse_function=lambda x: np.exp(x * _LN2),
             )
         elif base == "natural":
             super().__init__(transform_function=partial(np.log, **kwargs), inverse_function=np.exp)
@@ -301,44 +393,62 @@ class LogTransformer(Transformer):
             )
 
     @staticmethod
-    def _check_neg_values(data: Union[pd.DataFrame, pl.DataFrame], features: List[str]):
+    def _check_neg_values(data: Union[pd.DataFrame, pl.DataFrame, np.ndarray], features: List[str]):
+        if isinstance(data, np.ndarray):
+            if (data[:, features] < 0.0).any():
+                raise ValueError("Cannot apply log to negative values")
+            return
         data = data if isinstance(data, pl.DataFrame) else pandas_to_polars(data=data)
         negative_values = pl.DataFrame(data[features][pl.col("*") < 0.0].sum().rows()).sum()[:, 0][0]
         if negative_values > 0:
             raise ValueError("Cannot apply log to negative values")
 
-    def scale(self, data: Union[pd.DataFrame, pl.DataFrame], features: List[str]) -> pd.DataFrame:
+    def scale(
+        self,
+        data: Union[pd.DataFrame, pl.DataFrame, np.ndarray],
+        features: Union[List[str], List[int]],
+        return_polars: bool = False,
+    ) -> Union[pd.DataFrame, pl.DataFrame, np.ndarray]:
         """
         Scale features (columns) of given dataframe using log transform
 
         Parameters
         ----------
-        data: Union[pd.DataFrame, pl.DataFrame]
-        features: List[str]
+        data: Union[pd.DataFrame, pl.DataFrame, np.ndarray]
+        features: Union[List[str], List[int]]
+        return_polars: bool (default=False)
+            If True, return a polars.DataFrame rather than converting the result to Pandas
 
         Returns
         -------
-        Pandas.DataFrame
+        Pandas.DataFrame, polars.DataFrame or Numpy.Array
         """
         self._check_neg_values(data=data, features=features)
-        return super().scale(data=data, features=features)
+        return super().scale(data=data, features=features, return_polars=return_polars)
 
-    def inverse_scale(self, data: Union[pd.DataFrame, pl.DataFrame], features: List[str]) -> pd.DataFrame:
+    def inverse_scale(
+        self,
+        data: Union[pd.DataFrame, pl.DataFrame, np.ndarray],
+        features: Union[List[str], List[int]],
+        return_polars: bool = False,
+    ) -> Union[pd.DataFrame, pl.DataFrame, np.ndarray]:
         """
         Apply inverse of log transform to features (columns) of given dataframe,
         under the assumption that these features have previously been transformed with LogTransformer
 
         Parameters
         ----------
-        data: polars.DataFrame
-        features: List[str]
+        data: polars.DataFrame, Pandas.DataFrame or Numpy.Array
+        features: Union[List[str], List[int]]
+        return_polars: bool (default=False)
+            If True, return a polars.DataFrame rather than converting the result to Pandas
 
         Returns
         -------
-        Pandas.DataFrame
+        Pandas.DataFrame, polars.DataFrame or Numpy.Array
         """
         self._check_neg_values(data=data, features=features)
-        return super().inverse_scale(data=data, features=features)
+        return super().inverse_scale(data=data, features=features, return_polars=return_polars)
 
 
 class Normalise:
@@ -566,12 +676,13 @@ TRANSFORMERS = {
 
 
 def apply_transform(
-    data: Union[pd.DataFrame, pl.DataFrame],
-    features: List[str],
+    data: Union[pd.DataFrame, pl.DataFrame, np.ndarray],
+    features: Union[List[str], List[int]],
     method: str = "asinh",
     return_transformer: bool = False,
+    return_polars: bool = False,
     **kwargs,
-) -> Union[pd.DataFrame, Tuple[pd.DataFrame, None], Tuple[pd.DataFrame, Transformer]]:
+) -> Union[pd.DataFrame, pl.DataFrame, np.ndarray, Tuple[pd.DataFrame, None], Tuple[pd.DataFrame, Transformer]]:
     """
     Apply a transformation to the given DataFrame and the chosen
     columns (features). Transformation method is specified using the
@@ -584,13 +695,16 @@ def apply_transform(
 
     Parameters
     ----------
-    data: polars.DataFrame
+    data: polars.DataFrame, Pandas.DataFrame or Numpy.Array
     features: List or dict
-        Column names to be transformed
+        Column names to be transformed (or column indices if data is a Numpy.Array)
     method: str (default='logicle')
         Transformation method
     return_transformer: bool (default=False)
         If True, Transformer object is also returned
+    return_polars: bool (default=False)
+        If True, the transformed data is returned as a polars.DataFrame. For polars input this avoids
+        conversion to Pandas entirely
     kwargs
         Additional keyword arguments passed to respective Transformer
 
@@ -612,9 +726,9 @@ def apply_transform(
         raise TransformError(f"Invalid transform, must be one of: {list(TRANSFORMERS.keys())}")
     method = TRANSFORMERS.get(method)(**kwargs)
     if return_transformer:
-        x = method.scale(data=data, features=features)
+        x = method.scale(data=data, features=features, return_polars=return_polars)
         return x, method
-    return method.scale(data=data, features=features)
+    return method.scale(data=data, features=features, return_polars=return_polars)
 
 
 def apply_transform_map(